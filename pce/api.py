@@ -12,27 +12,90 @@ ProjectState,
 Preferences,
 ContextBundle,
 )
-from .compression import compress_frame, extract_keywords, compress_text
+from .compression import compress_frame, compress_text, _count_keywords, _top_keywords
 from .storage import write_frame
 from .retrieval import reconstruct_state
 
 
-def _classify_tags(user_msg: str, assistant_msg: str) -> List[str]:
+# Keyword ids for _scan_keywords; each id is one bit of a hit mask.
+_KW_TECH = 1 << 0
+_KW_PLAN = 1 << 1
+_KW_META = 1 << 2
+_KW_CONCISE = 1 << 3
+_KW_DETAILED = 1 << 4
+_KW_CASUAL = 1 << 5
+_KW_FORMAL = 1 << 6
+_KW_NO_CODE = 1 << 7
+_KW_NO_EXAMPLES = 1 << 8
+_KW_CURRENTLY = 1 << 9
+_KW_RIGHT_NOW = 1 << 10
+
+# Ids that only count when matched inside the user message.
+_USER_ONLY_KW = _KW_CURRENTLY | _KW_RIGHT_NOW
+
+_KEYWORD_IDS: Dict[str, int] = {
+"code": _KW_TECH,
+"api": _KW_TECH,
+"schema": _KW_TECH,
+"algorithm": _KW_TECH,
+"implementation": _KW_TECH,
+"stack": _KW_TECH,
+"bug": _KW_TECH,
+"plan": _KW_PLAN,
+"roadmap": _KW_PLAN,
+"milestone": _KW_PLAN,
+"schedule": _KW_PLAN,
+"timeline": _KW_PLAN,
+"next steps": _KW_PLAN,
+"think": _KW_META,
+"reflect": _KW_META,
+"meta": _KW_META,
+"why": _KW_META,
+"philosophy": _KW_META,
+"epistemology": _KW_META,
+"concise": _KW_CONCISE,
+"short answer": _KW_CONCISE,
+"detailed": _KW_DETAILED,
+"step-by-step": _KW_DETAILED,
+"casual": _KW_CASUAL,
+"formal": _KW_FORMAL,
+"no code": _KW_NO_CODE,
+"no examples": _KW_NO_EXAMPLES,
+"currently": _KW_CURRENTLY,
+"right now": _KW_RIGHT_NOW,
+}
+
+
+def _scan_keywords(user_lower: str, text_lower: str) -> int:
 """
-Rule-based tagging of the interaction.
+Return a bitmask of the keyword ids whose literals occur in the exchange.
+
+text_lower is f"{user_msg} {assistant_msg}".lower() and user_lower the
+lowercased user message; user-only ids are only tested against the latter.
+Each test is a C-level substring scan on the already-lowercased text.
+"""
+hits = 0
+for literal, kid in _KEYWORD_IDS.items():
+if literal in (user_lower if kid & _USER_ONLY_KW else text_lower):
+hits |= kid
+return hits
+
+
+def _classify_tags(hits: int) -> List[str]:
+"""
+Rule-based tagging of the interaction from its keyword hit mask.
 
 Rules:
 - if technical → 'tech'
 - if planning → 'plan'
 - if reflective/meta → 'meta'
 """
-text = f"{user_msg} {assistant_msg}".lower()
 tags: List[str] = []
-if any(k in text for k in ["code", "api", "schema", "algorithm", "implementation", "stack", "bug"]):
+if hits & _KW_TECH:
 tags.append("tech")
-if any(k in text for k in ["plan", "roadmap", "milestone", "schedule", "timeline", "next steps"]):
+if hits & _KW_PLAN:
 tags.append("plan")
-if any(k in text for k in ["think", "reflect", "meta", "why", "philosophy", "epistemology"]):
+if hits & _KW_META:
 tags.append("meta")
 if not tags:
 tags.append("general")
@@ -53,16 +116,20 @@ Deterministic system-output distillation.
 return compress_text(assistant_msg, max_chars=400)
 
 
-def _extract_semantic(user_msg: str, assistant_msg: str) -> SemanticMemory:
+def _extract_semantic(assistant_msg: str, keyword_counts: Dict[str, int]) -> SemanticMemory:
 """
 Lightweight semantic extraction: treat the assistant response as notes,
-keyed by high-signal topics.
+keyed by high-signal topics from the exchange's keyword counts.
 """
 notes = compress_text(assistant_msg, max_chars=400)
-topics = extract_keywords([user_msg, assistant_msg], max_keywords=8)
+topics = _top_keywords(keyword_counts, max_keywords=8)
 return SemanticMemory(concepts=topics, notes=notes)
 
 
+# Line prefixes that mark a workflow step; str.startswith takes the tuple directly.
+_WORKFLOW_PREFIXES = ("step ", "1.", "2.", "3.", "first", "second", "third")
+
+
 def _extract_procedural(user_msg: str, assistant_msg: str) -> ProceduralMemory:
 """
 Extract simple procedural hints by looking for bullet-like patterns or
@@ -73,12 +140,12 @@ lines = [ln.strip("-*• \t") for ln in combined.splitlines()]
 workflows: List[str] = []
 for ln in lines:
 lower = ln.lower()
-if any(lower.startswith(prefix) for prefix in ("step ", "1.", "2.", "3.", "first", "second", "third")):
+if lower.startswith(_WORKFLOW_PREFIXES):
 workflows.append(ln)
 return ProceduralMemory(workflows=workflows, checklists=[])
 
 
-def _extract_project_state(user_msg: str, assistant_msg: str) -> ProjectState:
+def _extract_project_state(user_msg: str, assistant_msg: str, hits: int) -> ProjectState:
 """
 Simple project-state extractor.
 
@@ -105,7 +172,7 @@ break
 summary = _distill_intent(user_msg)
 
 active_workstream = ""
-if "currently" in user_msg.lower() or "right now" in user_msg.lower():
+if hits & _USER_ONLY_KW:
 # Simple heuristic: take the sentence containing 'currently' or 'right now'.
 active_workstream = summary
 
@@ -118,29 +185,28 @@ constraints=[],
 )
 
 
-def _extract_preferences(user_msg: str, assistant_msg: str) -> Preferences:
+def _extract_preferences(hits: int) -> Preferences:
 """
-Extract obvious, stable user preferences from the interaction text.
+Extract obvious, stable user preferences from the interaction's keyword hits.
 This is intentionally shallow and deterministic.
 """
-text = f"{user_msg} {assistant_msg}".lower()
 style = ""
 tone = ""
 constraints: List[str] = []
 other: Dict[str, str] = {}
 
-if "concise" in text or "short answer" in text:
+if hits & _KW_CONCISE:
 style = "concise"
-if "detailed" in text or "step-by-step" in text:
+if hits & _KW_DETAILED:
 style = "detailed"
-if "casual" in text:
+if hits & _KW_CASUAL:
 tone = "casual"
-if "formal" in text:
+if hits & _KW_FORMAL:
 tone = "formal"
 
-if "no code" in text:
+if hits & _KW_NO_CODE:
 constraints.append("avoid code unless requested")
-if "no examples" in text:
+if hits & _KW_NO_EXAMPLES:
 constraints.append("avoid examples unless requested")
 
 return Preferences(style=style, tone=tone, constraints=constraints, other=other)
@@ -156,20 +222,23 @@ timestamp = datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
 distilled_intent = _distill_intent(raw_user_msg)
 distilled_output = _distill_output(raw_assistant_msg)
-tags = _classify_tags(raw_user_msg, raw_assistant_msg)
-semantic = _extract_semantic(raw_user_msg, raw_assistant_msg)
+# Lowercase and tokenize the exchange once; the keyword scan and the
+# semantic topics both work from it.
+user_lower = raw_user_msg.lower()
+text_lower = f"{user_lower} {raw_assistant_msg.lower()}"
+hits = _scan_keywords(user_lower, text_lower)
+keyword_counts = _count_keywords(text_lower)
+
+tags = _classify_tags(hits)
+semantic = _extract_semantic(raw_assistant_msg, keyword_counts)
 procedural = _extract_procedural(raw_user_msg, raw_assistant_msg)
-project_state = _extract_project_state(raw_user_msg, raw_assistant_msg)
-preferences = _extract_preferences(raw_user_msg, raw_assistant_msg)
-
-key_topics = extract_keywords(
-[raw_user_msg, raw_assistant_msg, semantic.notes, project_state.summary],
-max_keywords=12,
-)
+project_state = _extract_project_state(raw_user_msg, raw_assistant_msg, hits)
+preferences = _extract_preferences(hits)
 
 frame = RecapFrame(
 timestamp=timestamp,
-key_topics=key_topics,
+# compress_frame always rebuilds key_topics from the compressed fields.
+key_topics=[],
 distilled_user_intent=distilled_intent,
 distilled_system_output=distilled_output,
 tags=tags,
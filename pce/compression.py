@@ -1,53 +1,86 @@
 # pce/compression.py
 from __future__ import annotations
 
+import heapq
 import re
-from collections import Counter
-from typing import Iterable, List, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
 
 from .schema import RecapFrame
 
 # A small, explicit list of common English stopwords used for keyword extraction.
-_STOPWORDS = {
+_STOPWORDS = frozenset({
 "the", "and", "a", "an", "of", "to", "in", "for", "on", "at",
 "is", "are", "was", "were", "be", "been", "with", "as", "by",
 "or", "if", "then", "so", "we", "i", "you", "it", "that", "this",
 "but", "from", "our", "their", "they", "them", "my", "your",
-}
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+# One sentence per match: text up to and including a '.', '?' or '!', or a trailing fragment.
+_SENT_RE = re.compile(r"[^.!?]*[.!?]|[^.!?]+")
 
 
 def _tokenize(text: str) -> List[str]:
 """
 Deterministic tokenizer: lowercase, split on non-word characters.
 """
-text = text.lower()
-tokens = re.split(r"[^a-z0-9_]+", text)
-return [t for t in tokens if t]
+return _TOKEN_RE.findall(text.lower())
 
 
-def extract_keywords(texts: Iterable[str], max_keywords: int = 10) -> List[str]:
+def _is_single_sentence(cleaned: str) -> bool:
 """
-Frequency-based keyword extractor.
+True if sentence splitting and dedup would return whitespace-normalized
+text unchanged: it has at most one '.', '!' or '?', and that delimiter is
+followed by a space or ends the text.
+"""
+count = cleaned.count(".") + cleaned.count("!") + cleaned.count("?")
+if count != 1:
+return count == 0
+# Only one delimiter exists, so the other two finds return -1.
+i = max(cleaned.find("."), cleaned.find("!"), cleaned.find("?"))
+return i == len(cleaned) - 1 or cleaned[i + 1] == " "
 
-- Tokenizes deterministically.
-- Removes a small set of stopwords.
-- Returns the most frequent terms, stable-sorted by frequency then alphabetically.
+
+def _count_keywords(lower_text: str) -> Dict[str, int]:
+"""
+Count non-stopword tokens in text that is already lowercased.
 """
-counter: Counter = Counter()
-for text in texts:
-for tok in _tokenize(text):
+counter: Dict[str, int] = {}
+for tok in _TOKEN_RE.findall(lower_text):
 if tok in _STOPWORDS:
 continue
-counter[tok] += 1
+counter[tok] = counter.get(tok, 0) + 1
+return counter
 
+
+def _top_keywords(counter: Dict[str, int], max_keywords: int) -> List[str]:
+"""
+Most frequent terms of a _count_keywords() result, by frequency then alphabetically.
+"""
 if not counter:
 return []
 
-# Sort by (-freq, token) to get deterministic ordering.
-items: List[Tuple[str, int]] = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
-return [token for token, _ in items[:max_keywords]]
+# Order by (-freq, token) to get deterministic ordering. Keys are unique, so
+# the top-k heap selection matches a full sort truncated to max_keywords.
+items: List[Tuple[str, int]] = heapq.nsmallest(max_keywords, counter.items(), key=lambda kv: (-kv[1], kv[0]))
+return [token for token, _ in items]
 
 
+def extract_keywords(texts: Iterable[str], max_keywords: int = 10) -> List[str]:
+"""
+Frequency-based keyword extractor.
+
+- Tokenizes deterministically.
+- Removes a small set of stopwords.
+- Returns the most frequent terms, stable-sorted by frequency then alphabetically.
+"""
+# Tokens never span the joining space, so one pass over the joined text
+# counts the same terms as tokenizing each text separately.
+return _top_keywords(_count_keywords(" ".join(texts).lower()), max_keywords)
+
+
+@lru_cache(maxsize=256)
 def compress_text(text: str, max_chars: int = 600) -> str:
 """
 Lightweight, fully deterministic compression:
@@ -56,27 +89,22 @@ Lightweight, fully deterministic compression:
 - Deduplicates sentences.
 - Keeps sentences in original order.
 - Enforces a max character length by truncation at a boundary.
+
+Results are memoized per (text, max_chars); save_context compresses each
+message more than once.
 """
-# Normalize whitespace.
-cleaned = " ".join(text.strip().split())
+# Normalize whitespace. split() already drops leading/trailing whitespace,
+# and benchmarks faster than an equivalent compiled r"\s+" substitution.
+cleaned = " ".join(text.split())
 if not cleaned:
 return ""
 
+if _is_single_sentence(cleaned):
+# Fast path (common for distilled fields): nothing to split or dedup.
+result = cleaned
+else:
 # Split into sentences on '.', '?', '!'. Keep delimiters.
-parts = re.split(r"([.!?])", cleaned)
-sentences: List[str] = []
-current = ""
-for part in parts:
-if not part:
-continue
-current += part
-if part in ".!?":
-sentence = current.strip()
-if sentence:
-sentences.append(sentence)
-current = ""
-if current:
-sentences.append(current.strip())
+sentences: List[str] = [s for s in (m.group(0).strip() for m in _SENT_RE.finditer(cleaned)) if s]
 
 # Deduplicate sentences while preserving order.
 seen = set()
@@ -2,41 +2,49 @@
 from __future__ import annotations
 
 import re
-from typing import List, Tuple
+from typing import List, Optional, Pattern, Set, Tuple
 
 from .schema import ContextBundle, Preferences, RecapFrame, ProjectState
-from .storage import load_all
+from .storage import _load_columns
 from .compression import _tokenize # reuse deterministic tokenizer
 
 
-def _score_frame(query_tokens: List[str], frame: RecapFrame, index: int, total: int) -> float:
+def _compile_query(query_tokens: List[str]) -> Optional[Pattern[str]]:
+"""
+Compile all query tokens into one whole-word alternation, or None if empty.
+"""
+alternatives = [re.escape(tok) for tok in query_tokens if tok]
+if not alternatives:
+return None
+return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+
+def _score_frame(
+query_tokens: List[str],
+query_re: Optional[Pattern[str]],
+search_text: str,
+index: int,
+total: int,
+) -> float:
 """
 Deterministic scoring function combining keyword overlap and recency.
 
 - query_tokens: normalized tokens from the query.
+- query_re: _compile_query(query_tokens), compiled once per query.
+- search_text: the frame's lowercased text (FrameColumns.search_texts()),
+unused when there are no query tokens.
 - index: position of the frame in chronological list.
 - total: total number of frames.
 """
-if not query_tokens:
+if not query_tokens or query_re is None:
 # If there is no query, just score by recency.
 recency_weight = 1.0 + (index / max(total - 1, 1))
 return recency_weight
 
-text = " ".join([
-" ".join(frame.key_topics),
-frame.distilled_user_intent,
-frame.distilled_system_output,
-frame.project_state.summary,
-frame.raw_user_message,
-]).lower()
-
-# Keyword match count.
-match_count = 0
-for tok in query_tokens:
-if not tok:
-continue
-if re.search(r"\b" + re.escape(tok) + r"\b", text):
-match_count += 1
+# Keyword match count: every query token (repeats included) found as a
+# whole word. Matches are whole words, so one findall sees all of them.
+found = set(query_re.findall(search_text))
+match_count = sum(1 for tok in query_tokens if tok in found)
 
 if match_count == 0:
 return 0.0
@@ -49,25 +57,45 @@ return match_count * recency_weight
 def retrieve_relevant_frames(query: str = "", max_results: int = 12) -> List[RecapFrame]:
 """
 Retrieve the most relevant frames for a query using deterministic scoring.
+
+Returned frames are copies of the cached ones, safe for callers to modify.
 """
-frames = load_all()
+columns = _load_columns()
+frames = columns.frames
 if not frames:
 return []
 
 query_tokens = _tokenize(query) if query else []
+query_re = _compile_query(query_tokens)
 
-scored: List[Tuple[float, RecapFrame]] = []
+# Score frame indices against the flat columns; frames are looked up last.
+scored: List[Tuple[float, int]] = []
 total = len(frames)
-for idx, frame in enumerate(frames):
-score = _score_frame(query_tokens, frame, idx, total)
+# Only a query with tokens reads the text column, so only then is it built.
+texts = columns.search_texts() if query_re is not None else [""] * total
+for idx, text in enumerate(texts):
+score = _score_frame(query_tokens, query_re, text, idx, total)
 if score <= 0.0 and query_tokens:
 continue
-scored.append((score, frame))
+scored.append((score, idx))
 
 # Sort by score descending, then by timestamp (string compare is fine for ISO)
-scored.sort(key=lambda sf: (-sf[0], sf[1].timestamp))
+timestamps = columns.timestamps
+scored.sort(key=lambda si: (-si[0], timestamps[si[1]]))
+
+return [frames[idx].copy() for score, idx in scored[:max_results] if score > 0.0 or not query_tokens]
 
-return [frame for score, frame in scored[:max_results] if score > 0.0 or not query_tokens]
+
+def _extend_unique(out: List[str], seen: Set[str], values: List[str]) -> None:
+"""
+Order-preserving dedup: append stripped, non-empty values not yet in seen.
+"""
+for v in values:
+vv = v.strip()
+if not vv or vv in seen:
+continue
+seen.add(vv)
+out.append(vv)
 
 
 def reconstruct_state(query: str = "", max_frames: int = 12) -> ContextBundle:
@@ -77,8 +105,7 @@ Reconstruct a unified context bundle from the most relevant frames.
 frames = retrieve_relevant_frames(query=query, max_results=max_frames)
 # If no frames match the query, fall back to the most recent few.
 if not frames:
-all_frames = load_all()
-frames = all_frames[-max_frames:]
+frames = [frame.copy() for frame in _load_columns().frames[-max_frames:]]
 
 if not frames:
 # Empty bundle.
@@ -99,12 +126,16 @@ primary = frames[-1]
 # otherwise build one from key topics and distilled intent.
 project_summary = ""
 active_workstream = ""
+# Lists are deduplicated (order-preserving) as they are aggregated.
 pending_tasks: List[str] = []
+pending_seen: Set[str] = set()
 constraints: List[str] = []
+constraints_seen: Set[str] = set()
 # Aggregate preferences.
 style = ""
 tone = ""
 pref_constraints: List[str] = []
+pref_constraints_seen: Set[str] = set()
 other_prefs = {}
 
 for frame in frames:
@@ -113,14 +144,14 @@ if ps.summary:
 project_summary = ps.summary
 if ps.active_workstream:
 active_workstream = ps.active_workstream
-pending_tasks.extend(ps.pending_tasks)
-constraints.extend(ps.constraints)
+_extend_unique(pending_tasks, pending_seen, ps.pending_tasks)
+_extend_unique(constraints, constraints_seen, ps.constraints)
 
 if frame.preferences.style:
 style = frame.preferences.style
 if frame.preferences.tone:
 tone = frame.preferences.tone
-pref_constraints.extend(frame.preferences.constraints)
+_extend_unique(pref_constraints, pref_constraints_seen, frame.preferences.constraints)
 for k, v in frame.preferences.other.items():
 other_prefs[k] = v
 
@@ -131,22 +162,6 @@ project_summary = primary.distilled_user_intent or " | ".join(primary.key_topics
 if not active_workstream:
 active_workstream = primary.project_state.active_workstream
 
-# Deduplicate lists while preserving order.
-def dedup(values: List[str]) -> List[str]:
-seen = set()
-result: List[str] = []
-for v in values:
-vv = v.strip()
-if not vv or vv in seen:
-continue
-seen.add(vv)
-result.append(vv)
-return result
-
-pending_tasks = dedup(pending_tasks)
-constraints = dedup(constraints)
-pref_constraints = dedup(pref_constraints)
-
 # Simple recommended-next-steps heuristic:
 # - If we have pending_tasks, use the first few.
 # - Otherwise, suggest continuing the active_workstream.
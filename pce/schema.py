@@ -1,11 +1,16 @@
 # pce/schema.py
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
+import sys
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 
+# Slotted dataclasses skip the per-instance __dict__ (smaller frames, faster
+# attribute reads); dataclass(slots=...) only exists on Python 3.10+.
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class SemanticMemory:
 """
 Long-lived conceptual information extracted from interactions.
@@ -16,7 +21,10 @@ concepts: List[str] = field(default_factory=list)
 notes: str = ""
 
 def to_dict(self) -> Dict[str, Any]:
-return asdict(self)
+return {
+"concepts": list(self.concepts),
+"notes": self.notes,
+}
 
 @staticmethod
 def from_dict(data: Optional[Dict[str, Any]]) -> "SemanticMemory":
@@ -28,7 +36,7 @@ notes=str(data.get("notes", "")),
 )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ProceduralMemory:
 """
 Stable "how-to" knowledge: workflows, checklists, repeatable steps.
@@ -37,7 +45,10 @@ workflows: List[str] = field(default_factory=list)
 checklists: List[str] = field(default_factory=list)
 
 def to_dict(self) -> Dict[str, Any]:
-return asdict(self)
+return {
+"workflows": list(self.workflows),
+"checklists": list(self.checklists),
+}
 
 @staticmethod
 def from_dict(data: Optional[Dict[str, Any]]) -> "ProceduralMemory":
@@ -49,7 +60,7 @@ checklists=list(data.get("checklists", [])),
 )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ProjectState:
 """
 Snapshot of the current project and active work.
@@ -64,7 +75,13 @@ pending_tasks: List[str] = field(default_factory=list)
 constraints: List[str] = field(default_factory=list)
 
 def to_dict(self) -> Dict[str, Any]:
-return asdict(self)
+return {
+"project_name": self.project_name,
+"summary": self.summary,
+"active_workstream": self.active_workstream,
+"pending_tasks": list(self.pending_tasks),
+"constraints": list(self.constraints),
+}
 
 @staticmethod
 def from_dict(data: Optional[Dict[str, Any]]) -> "ProjectState":
@@ -79,7 +96,7 @@ constraints=list(data.get("constraints", [])),
 )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Preferences:
 """
 User preferences that should persist across sessions.
@@ -90,7 +107,12 @@ constraints: List[str] = field(default_factory=list)
 other: Dict[str, str] = field(default_factory=dict)
 
 def to_dict(self) -> Dict[str, Any]:
-return asdict(self)
+return {
+"style": self.style,
+"tone": self.tone,
+"constraints": list(self.constraints),
+"other": dict(self.other),
+}
 
 @staticmethod
 def from_dict(data: Optional[Dict[str, Any]]) -> "Preferences":
@@ -104,7 +126,7 @@ other=dict(data.get("other", {})),
 )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RecapFrame:
 """
 A single interaction recap that gets written to persistent storage.
@@ -125,6 +147,18 @@ preferences: Preferences = field(default_factory=Preferences)
 raw_user_message: str = ""
 raw_assistant_message: str = ""
 
+def search_text(self) -> str:
+"""
+Lowercased text that retrieval matches queries against.
+"""
+return " ".join([
+" ".join(self.key_topics),
+self.distilled_user_intent,
+self.distilled_system_output,
+self.project_state.summary,
+self.raw_user_message,
+]).lower()
+
 def to_dict(self) -> Dict[str, Any]:
 """
 Serialize to a JSON-serializable dict.
@@ -162,8 +196,14 @@ raw_user_message=str(data.get("raw_user_message", "")),
 raw_assistant_message=str(data.get("raw_assistant_message", "")),
 )
 
+def copy(self) -> "RecapFrame":
+"""
+Independent copy: every nested memory object, list and dict is fresh.
+"""
+return RecapFrame.from_dict(self.to_dict())
+
 
-@dataclass
+@dataclass(**_SLOTS)
 class ContextBundle:
 """
 Unified reconstructed context used by the next session.
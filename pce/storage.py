@@ -1,15 +1,79 @@
 # pce/storage.py
 from __future__ import annotations
 
+import atexit
 import json
 import os
-from typing import List
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Tuple
 
-from .schema import RecapFrame
+from .schema import _SLOTS, RecapFrame
+
+try:
+# Optional speedup; the package itself stays dependency-free.
+import orjson
+except ImportError:
+orjson = None # type: ignore[assignment]
 
 MEMORY_DIR = os.path.join(".", "memory")
 MEMORY_FILE = os.path.join(MEMORY_DIR, "context.jsonl")
 MAX_FRAMES = 300
+# Pruning rereads the whole log, so long-running writers only consider it every
+# PRUNE_INTERVAL writes; the log may briefly hold up to
+# MAX_FRAMES + PRUNE_INTERVAL - 1 lines.
+PRUNE_INTERVAL = 32
+
+# Every record carries the full key set, so even a frame with all values empty
+# encodes to 404 bytes (orjson; the stdlib format is longer), plus its newline.
+# A log smaller than (MAX_FRAMES + 1) such lines cannot be over the cap, and
+# one os.path.getsize() call is enough to skip the prune.
+_MIN_LINE_BYTES = 405
+_PRUNE_MIN_SIZE = (MAX_FRAMES + 1) * _MIN_LINE_BYTES
+
+# Starts saturated so every process checks on its first write (the CLI only
+# ever writes once per run); the size guard keeps that check O(1) until the
+# log is large enough to need pruning.
+_writes_since_prune = PRUNE_INTERVAL
+
+
+@dataclass(**_SLOTS)
+class FrameColumns:
+"""
+Column-oriented view of the loaded frames, used by retrieval scoring.
+
+Entry i of every column belongs to frames[i], so the scoring loop only
+touches the flat columns it needs and indexes back into frames at the end.
+"""
+frames: List[RecapFrame] = field(default_factory=list)
+timestamps: List[str] = field(default_factory=list)
+# Built by search_texts() on first use; recency-only loads never need it.
+_search_texts: Optional[List[str]] = field(default=None, init=False, repr=False, compare=False)
+
+def search_texts(self) -> List[str]:
+"""
+Column of RecapFrame.search_text() values, built on first call.
+"""
+if self._search_texts is None:
+self._search_texts = [f.search_text() for f in self.frames]
+return self._search_texts
+
+@staticmethod
+def from_frames(frames: List[RecapFrame]) -> "FrameColumns":
+return FrameColumns(
+frames=frames,
+timestamps=[f.timestamp for f in frames],
+)
+
+
+# Frames parsed by the last load, keyed on (path, mtime_ns, size) of the log
+# so repeated loads skip decoding until the file changes. These objects never
+# leave the package; public loads hand out copies.
+_cache: Optional[Tuple[Tuple[str, int, int], FrameColumns]] = None
+
+# Append handle kept open across write_frame calls, and the path it was opened on.
+_fh: Optional[BinaryIO] = None
+_fh_path = ""
 
 
 def _ensure_memory_dir() -> None:
@@ -19,6 +83,69 @@ Ensure the memory directory exists.
 os.makedirs(MEMORY_DIR, exist_ok=True)
 
 
+def _get_fh() -> BinaryIO:
+"""
+Return the shared append handle for MEMORY_FILE, opening it on first use.
+
+The handle is reopened if MEMORY_FILE has been pointed elsewhere or the
+file it refers to has been unlinked (deleted, or replaced by a prune in
+another process), so frames are never appended to an orphaned inode.
+"""
+global _fh, _fh_path
+if _fh is not None and (_fh_path != MEMORY_FILE or os.fstat(_fh.fileno()).st_nlink == 0):
+_close_fh()
+if _fh is None:
+_ensure_memory_dir()
+_fh = open(MEMORY_FILE, "ab")
+_fh_path = MEMORY_FILE
+return _fh
+
+
+def _close_fh() -> None:
+"""
+Close the shared append handle, if open; the next write reopens it.
+"""
+global _fh
+if _fh is not None:
+_fh.close()
+_fh = None
+
+
+atexit.register(_close_fh)
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+"""
+Encode one log record as key-sorted JSON.
+
+Without orjson the output is exactly the ASCII-escaped json.dumps format
+the log has always used. orjson rejects strings it cannot encode as UTF-8
+(lone surrogates, e.g. from stdin read with errors="surrogateescape");
+those records fall back to the same escaped format instead of failing.
+"""
+if orjson is not None:
+try:
+return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+except TypeError:
+pass
+return json.dumps(data, sort_keys=True).encode("ascii")
+
+
+def _loads(line: bytes) -> Any:
+"""
+Decode one log record; raises ValueError on malformed input.
+
+orjson also refuses escaped lone surrogates, which the stdlib accepts, so
+lines it rejects get a second try with json before being treated as corrupt.
+"""
+if orjson is not None:
+try:
+return orjson.loads(line)
+except ValueError:
+pass
+return json.loads(line)
+
+
 def write_frame(frame: RecapFrame) -> None:
 """
 Append a single RecapFrame to the JSONL log and prune if necessary.
@@ -26,50 +153,97 @@ Append a single RecapFrame to the JSONL log and prune if necessary.
 The log is append-only under normal operation; pruning rewrites the file
 keeping only the most recent MAX_FRAMES frames.
 """
-_ensure_memory_dir()
-line = json.dumps(frame.to_dict(), sort_keys=True)
-with open(MEMORY_FILE, "a", encoding="utf-8") as f:
-f.write(line + "\n")
-
+global _writes_since_prune, _cache
+line = _dumps(frame.to_dict())
+f = _get_fh()
+f.write(line + b"\n")
+f.flush()
+_cache = None
+
+_writes_since_prune += 1
+if _writes_since_prune >= PRUNE_INTERVAL:
+if os.path.getsize(MEMORY_FILE) >= _PRUNE_MIN_SIZE:
 _prune_if_needed()
+_writes_since_prune = 0
 
 
 def load_all() -> List[RecapFrame]:
 """
 Load all frames from the JSONL log, in chronological order.
+
+At most the most recent MAX_FRAMES frames are returned, even if pruning
+has not caught up with the log yet. Parsing is cached until the file's
+mtime or size changes, but every call returns fresh frame objects, so
+callers may modify them freely.
 """
-if not os.path.exists(MEMORY_FILE):
-return []
+return [frame.copy() for frame in _load_columns().frames]
+
+
+def _load_columns() -> FrameColumns:
+"""
+Load the cached frames together with their scoring columns.
+
+The result is shared cache state: read it, and copy() any frame that is
+handed out of the package.
+"""
+global _cache
+try:
+st = os.stat(MEMORY_FILE)
+except FileNotFoundError:
+return FrameColumns()
+key = (MEMORY_FILE, st.st_mtime_ns, st.st_size)
+if _cache is not None and _cache[0] == key:
+return _cache[1]
 
 frames: List[RecapFrame] = []
-with open(MEMORY_FILE, "r", encoding="utf-8") as f:
+with open(MEMORY_FILE, "rb") as f:
 for line in f:
 line = line.strip()
 if not line:
 continue
 try:
-data = json.loads(line)
+data = _loads(line)
 frames.append(RecapFrame.from_dict(data))
-except json.JSONDecodeError:
+except ValueError:
 # Corrupted line; skip but keep the rest.
 continue
-return frames
+columns = FrameColumns.from_frames(frames[-MAX_FRAMES:])
+_cache = (key, columns)
+return columns
 
 
 def _prune_if_needed() -> None:
 """
 If the log has grown beyond MAX_FRAMES, keep only the most recent frames.
 
-This is done by rewriting the file with the last MAX_FRAMES entries.
+This is done by rewriting the file with the last MAX_FRAMES entries. Lines
+are carried over verbatim, so nothing is decoded or re-encoded; the rewrite
+goes through a temporary file and os.replace so the log is never left
+half-written.
 """
-frames = load_all()
-if len(frames) <= MAX_FRAMES:
+global _cache
+if not os.path.exists(MEMORY_FILE):
+return
+
+count = 0
+tail: Deque[bytes] = deque(maxlen=MAX_FRAMES)
+with open(MEMORY_FILE, "rb") as f:
+for line in f:
+if not line.strip():
+continue
+count += 1
+tail.append(line)
+if count <= MAX_FRAMES:
 return
+# Only the file's final line can be missing its newline.
+if not tail[-1].endswith(b"\n"):
+tail[-1] += b"\n"
 
 # Keep only the most recent MAX_FRAMES.
-frames = frames[-MAX_FRAMES:]
-_ensure_memory_dir()
-with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-for frame in frames:
-line = json.dumps(frame.to_dict(), sort_keys=True)
-f.write(line + "\n")
+tmp_file = MEMORY_FILE + ".tmp"
+with open(tmp_file, "wb") as f:
+f.writelines(tail)
+# The append handle would keep pointing at the replaced file.
+_close_fh()
+os.replace(tmp_file, MEMORY_FILE)
+_cache = None